@@ -1,3 +1,4 @@
-from agents.agents import DEFAULT_AGENT, get_agent, get_all_agent_info
+from agents.agents import (DEFAULT_AGENT, get_agent, get_all_agent_info,
+                           warmup_agents)
 
-__all__ = ["get_agent", "get_all_agent_info", "DEFAULT_AGENT"]
+__all__ = ["get_agent", "get_all_agent_info", "warmup_agents", "DEFAULT_AGENT"]
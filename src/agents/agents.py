@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from dataclasses import dataclass
 
 from langgraph.graph.state import CompiledStateGraph
@@ -7,7 +8,8 @@ from agents.chatbot import chatbot
 from agents.command_agent import command_agent
 from agents.interrupt_agent import interrupt_agent
 from agents.langgraph_supervisor_agent import langgraph_supervisor_agent
-from agents.research_assistant import research_assistant
+from agents.research_assistant import (research_assistant,
+                                       warmup_research_assistant)
 from schema import AgentInfo
 
 DEFAULT_AGENT = "travel-chatbot-assistant"
@@ -17,11 +19,14 @@ DEFAULT_AGENT = "travel-chatbot-assistant"
 class Agent:
     description: str
     graph: CompiledStateGraph
+    warmup: Callable[[], None] | None = None
 
 
 agents: dict[str, Agent] = {
     "travel-chatbot-assistant": Agent(
-        description="A travel chatbot assistant", graph=research_assistant
+        description="A travel chatbot assistant",
+        graph=research_assistant,
+        warmup=warmup_research_assistant,
     )
 }
 
@@ -30,6 +35,13 @@ def get_agent(agent_id: str) -> CompiledStateGraph:
     return agents[agent_id].graph
 
 
+def warmup_agents() -> None:
+    """Prime per-agent caches so the first request doesn't pay their setup cost."""
+    for agent in agents.values():
+        if agent.warmup is not None:
+            agent.warmup()
+
+
 def get_all_agent_info() -> list[AgentInfo]:
     return [
         AgentInfo(key=agent_id, description=agent.description)
@@ -1,17 +1,22 @@
+import asyncio
+import hashlib
+import json
+import re
 from datetime import datetime
-from typing import Literal
+from typing import Any, Literal
 
+from cachetools import TTLCache
 from langchain_community.tools import (DuckDuckGoSearchResults,
                                        OpenWeatherMapQueryRun)
 from langchain_community.utilities import OpenWeatherMapAPIWrapper
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.messages import (AIMessage, AnyMessage, HumanMessage,
+                                     RemoveMessage, SystemMessage, ToolMessage)
 from langchain_core.runnables import (RunnableConfig, RunnableLambda,
                                       RunnableSerializable)
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, MessagesState, StateGraph
 from langgraph.managed import RemainingSteps
-from langgraph.prebuilt import ToolNode
 
 from agents.llama_guard import LlamaGuard, LlamaGuardOutput, SafetyAssessment
 from agents.tools import (calculator, current_location, nearby_places, route,
@@ -30,6 +35,14 @@ class AgentState(MessagesState, total=False):
 
 web_search = DuckDuckGoSearchResults(name="WebSearch")
 tools = [web_search, calculator, nearby_places, current_location, route, sos_alert]
+tools_by_name = {t.name: t for t in tools}
+
+llama_guard = LlamaGuard()
+
+# Upper bound on the conversation kept in state. Every node transition
+# checkpoints the full message list, so an unbounded history makes each write
+# grow with the length of the conversation.
+MAX_RETAINED_MESSAGES = 20
 
 current_date = datetime.now().strftime("%B %d, %Y")
 base_instructions = f"""
@@ -103,23 +116,56 @@ get_route_agent_instructions = (
 )
 
 
+AGENT_INSTRUCTIONS = {
+    "location": location_agent_instructions,
+    "emergency": emergency_agent_instructions,
+    "companion": companion_agent_instructions,
+    "nearby_places": nearby_places_agent_instructions,
+    "get_route": get_route_agent_instructions,
+}
+
+# Model runnables with tools bound, keyed by (id(model), agent_type). get_model()
+# caches model instances, so the ids stay stable for the life of the process.
+_WRAPPED: dict[tuple[int, str], RunnableSerializable[AgentState, AIMessage]] = {}
+
+
 def wrap_model(
     model: BaseChatModel, agent_type: str
 ) -> RunnableSerializable[AgentState, AIMessage]:
-    model = model.bind_tools(tools)
-    instructions = {
-        "location": location_agent_instructions,
-        "emergency": emergency_agent_instructions,
-        "companion": companion_agent_instructions,
-        "nearby_places": nearby_places_agent_instructions,
-        "get_route": get_route_agent_instructions,
-    }.get(agent_type, base_instructions)
+    key = (id(model), agent_type)
+    if key in _WRAPPED:
+        return _WRAPPED[key]
 
+    instructions = AGENT_INSTRUCTIONS.get(agent_type, base_instructions)
     preprocessor = RunnableLambda(
         lambda state: [SystemMessage(content=instructions)] + state["messages"],
         name="StateModifier",
     )
-    return preprocessor | model
+    _WRAPPED[key] = preprocessor | model.bind_tools(tools)
+    return _WRAPPED[key]
+
+
+def warmup_research_assistant() -> None:
+    """Build the tool-bound runnables for the default model ahead of the first request."""
+    m = get_model(settings.DEFAULT_MODEL)
+    for agent_type in AGENT_INSTRUCTIONS:
+        wrap_model(m, agent_type)
+
+
+def trim_history(messages: list[AnyMessage]) -> list[RemoveMessage]:
+    """Return removals that keep at most MAX_RETAINED_MESSAGES recent messages.
+
+    The cut is moved forward to the next human message so an AI tool call is
+    never separated from its tool results. The latest exchange is always kept.
+    """
+    if len(messages) <= MAX_RETAINED_MESSAGES:
+        return []
+    humans = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    if not humans:
+        return []
+    start = len(messages) - MAX_RETAINED_MESSAGES
+    cut = next((i for i in humans if i >= start), humans[-1])
+    return [RemoveMessage(id=m.id) for m in messages[:cut]]
 
 
 def format_safety_message(safety: LlamaGuardOutput) -> AIMessage:
@@ -127,61 +173,89 @@ def format_safety_message(safety: LlamaGuardOutput) -> AIMessage:
     return AIMessage(content=content)
 
 
+EMERGENCY_KEYWORDS = (
+    "emergency",
+    "help",
+    "danger",
+    "unsafe",
+    "threat",
+    "attack",
+    "harassment",
+)
+LOCATION_KEYWORDS = (
+    "location",
+    "place",
+    "area",
+    "destination",
+    "neighborhood",
+    "region",
+)
+# One case-insensitive alternation per agent, so each check is a single scan
+# of the message without building a lowercased copy first
+_EMERGENCY_RE = re.compile("|".join(EMERGENCY_KEYWORDS), re.IGNORECASE)
+_LOCATION_RE = re.compile("|".join(LOCATION_KEYWORDS), re.IGNORECASE)
+
+# Routing decisions keyed by a hash of the user's message
+_routing_cache: TTLCache[str, str] = TTLCache(maxsize=512, ttl=600)
+
+
 def determine_agent(state: AgentState) -> Literal["location", "emergency", "companion"]:
     """Determine which agent should handle the conversation based on the user's message."""
-    last_message = state["messages"][-1].content.lower()
-
-    # Emergency keywords
-    emergency_keywords = [
-        "emergency",
-        "help",
-        "danger",
-        "unsafe",
-        "threat",
-        "attack",
-        "harassment",
-    ]
-    if any(keyword in last_message for keyword in emergency_keywords):
+    last_message = state["messages"][-1].content
+
+    if _EMERGENCY_RE.search(last_message):
         return "emergency"
 
-    # Location keywords
-    location_keywords = [
-        "location",
-        "place",
-        "area",
-        "destination",
-        "neighborhood",
-        "region",
-    ]
-    if any(keyword in last_message for keyword in location_keywords):
+    if _LOCATION_RE.search(last_message):
         return "location"
 
     # Default to companion agent
     return "companion"
 
 
-async def supervisor(state: AgentState, config: RunnableConfig) -> AgentState:
-    """Supervisor node that manages the conversation flow and handles responses."""
-    # Initialize the conversation on first run
-    if not state.get("messages") or state.get("first_run", True):
-        return {
-            "messages": [
-                AIMessage(
-                    content="""Hello! I'm your travel safety companion. I'm here to support you and help ensure your safety during your travels. 
+def cached_determine_agent(state: AgentState) -> str:
+    """Wrap determine_agent with a cache of previous routing decisions."""
+    if not settings.ROUTING_CACHE_ENABLED:
+        return determine_agent(state)
+
+    last_message = state["messages"][-1].content
+    key = hashlib.blake2b(last_message.encode(), digest_size=8).hexdigest()
+    current_agent = _routing_cache.get(key)
+    if current_agent is None:
+        current_agent = determine_agent(state)
+        _routing_cache[key] = current_agent
+    return current_agent
+
+
+def greeting(state: AgentState) -> AgentState:
+    """Greeting node that opens the conversation on the first run."""
+    return {
+        "messages": [
+            AIMessage(
+                content="""Hello! I'm your travel safety companion. I'm here to support you and help ensure your safety during your travels. 
                     I can help you with:
                     - Location safety information and tips
                     - Emergency guidance and resources
                     - General travel safety advice and companionship
                     
                     How can I assist you today? Feel free to ask any questions about your travel safety concerns."""
-                )
-            ],
-            "current_agent": "companion",
-            "first_run": False,
-        }
+            )
+        ],
+        "current_agent": "companion",
+        "first_run": False,
+    }
+
+
+def route_entry(state: AgentState) -> Literal["greeting", "supervisor"]:
+    if not state.get("messages") or state.get("first_run", True):
+        return "greeting"
+    return "supervisor"
+
 
+async def supervisor(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Supervisor node that manages the conversation flow and handles responses."""
     # Determine which agent should handle the message
-    current_agent = determine_agent(state)
+    current_agent = cached_determine_agent(state)
     state["current_agent"] = current_agent
 
     # Get model and generate response
@@ -189,8 +263,21 @@ async def supervisor(state: AgentState, config: RunnableConfig) -> AgentState:
     model_runnable = wrap_model(m, current_agent)
     response = await model_runnable.ainvoke(state, config)
 
+    if response.tool_calls:
+        if state["remaining_steps"] < 2:
+            return {
+                "messages": [
+                    AIMessage(
+                        id=response.id,
+                        content="I apologize, but I need more steps to process this request. Would you like me to help you with something else?",
+                    )
+                ]
+            }
+        # Tool call turns have no user-visible answer yet, so the safety check
+        # runs once on the final response after the tool loop completes.
+        return {"messages": [response]}
+
     # Run llama guard check to avoid returning the message if it's unsafe
-    llama_guard = LlamaGuard()
     safety_output = await llama_guard.ainvoke("Agent", state["messages"] + [response])
     if safety_output.safety_assessment == SafetyAssessment.UNSAFE:
         return {
@@ -198,17 +285,59 @@ async def supervisor(state: AgentState, config: RunnableConfig) -> AgentState:
             "safety": safety_output,
         }
 
-    if state["remaining_steps"] < 2 and response.tool_calls:
-        return {
-            "messages": [
-                AIMessage(
-                    id=response.id,
-                    content="I apologize, but I need more steps to process this request. Would you like me to help you with something else?",
-                )
-            ]
-        }
+    return {"messages": trim_history(state["messages"]) + [response]}
+
+
+def _tool_content(output: Any) -> str | list:
+    """Convert a tool output into ToolMessage content, mirroring ToolNode."""
+    if isinstance(output, str):
+        return output
+    if isinstance(output, list) and all(
+        isinstance(x, dict) and "type" in x for x in output
+    ):
+        return output
+    try:
+        return json.dumps(output, ensure_ascii=False)
+    except Exception:
+        return str(output)
+
+
+async def parallel_tools(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Run every tool call of the last AIMessage concurrently."""
+    tool_calls = state["messages"][-1].tool_calls
+
+    async def run_tool(call: dict) -> Any:
+        tool = tools_by_name.get(call["name"])
+        if tool is None:
+            raise ValueError(
+                f"{call['name']} is not a valid tool, try one of {list(tools_by_name)}."
+            )
+        return await tool.ainvoke(call["args"], config)
+
+    results = await asyncio.gather(
+        *(run_tool(call) for call in tool_calls), return_exceptions=True
+    )
 
-    return {"messages": [response]}
+    tool_messages = []
+    for call, result in zip(tool_calls, results):
+        if isinstance(result, Exception):
+            tool_messages.append(
+                ToolMessage(
+                    content=f"Error: {result!r}\n Please fix your mistakes.",
+                    name=call["name"],
+                    tool_call_id=call["id"],
+                    status="error",
+                )
+            )
+        else:
+            tool_messages.append(
+                ToolMessage(
+                    content=_tool_content(result),
+                    name=call["name"],
+                    tool_call_id=call["id"],
+                )
+            )
+    return {"messages": tool_messages}
 
 
 # Define the routing logic
@@ -224,9 +353,13 @@ def route_next(state: AgentState) -> Literal["supervisor", "tools", "done"]:
 
 # Define the graph
 agent = StateGraph(AgentState)
+agent.add_node("greeting", greeting)
 agent.add_node("supervisor", supervisor)
-agent.add_node("tools", ToolNode(tools))
-agent.set_entry_point("supervisor")
+agent.add_node("tools", parallel_tools)
+agent.set_conditional_entry_point(
+    route_entry, {"greeting": "greeting", "supervisor": "supervisor"}
+)
+agent.add_edge("greeting", END)
 agent.add_conditional_edges(
     "supervisor",
     route_next,
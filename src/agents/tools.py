@@ -1,39 +1,143 @@
-import json
+import ast
+import asyncio
 import math
 import os
-import re
+import threading
 from datetime import datetime
+from functools import cache
 
-import numexpr
-import requests
+import httpx
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from langchain_core.tools import BaseTool, tool
 
+load_dotenv()
+
+BACKEND_URL = os.getenv("BACKEND_URL")
+BACKEND_AUTH_TOKEN = os.getenv("BACKEND_AUTH_TOKEN", "asdasd")
+# Whether the backend serves /api/maps/route-with-safety, which geocodes, routes
+# and generates safety tips in one round-trip instead of four
+BACKEND_ROUTE_WITH_SAFETY = os.getenv("BACKEND_ROUTE_WITH_SAFETY", "").lower() == "true"
+_HEADERS = {
+    "Content-Type": "application/json",
+    "Authorization": f"Bearer {BACKEND_AUTH_TOKEN}",
+}
+
+
+# The only names a calculator expression can see. asteval's default symtable
+# also carries builtins like open() and dir(), and the expression comes from
+# the LLM, so anything outside this list must stay unreachable.
+_CALC_FUNCTIONS = (
+    "acos",
+    "acosh",
+    "asin",
+    "asinh",
+    "atan",
+    "atan2",
+    "atanh",
+    "ceil",
+    "cos",
+    "cosh",
+    "degrees",
+    "exp",
+    "fabs",
+    "floor",
+    "fmod",
+    "hypot",
+    "log",
+    "log10",
+    "log1p",
+    "log2",
+    "radians",
+    "sin",
+    "sinh",
+    "sqrt",
+    "tan",
+    "tanh",
+    "trunc",
+)
+# Same bound asteval puts on exponents. Builtins called from an expression
+# bypass asteval's guards, so this one keeps factorial() from stalling every
+# calculator call queued behind _ASTEVAL_LOCK. pow() is left out for the same
+# reason: the guarded ** operator covers it.
+_MAX_FACTORIAL = 10000
+
+
+def _factorial(n: int) -> int:
+    if n > _MAX_FACTORIAL:
+        raise ValueError(f"factorial() argument should not exceed {_MAX_FACTORIAL}")
+    return math.factorial(n)
+
+
+_CALC_SYMBOLS = {
+    **{name: getattr(math, name) for name in _CALC_FUNCTIONS},
+    "abs": abs,
+    "factorial": _factorial,
+    "max": max,
+    "min": min,
+    "round": round,
+    "pi": math.pi,
+    "e": math.e,
+}
+_ASTEVAL_LOCK = threading.Lock()
+
+
+@cache
+def _get_interpreter():
+    """Build the calculator's interpreter on first use.
+
+    One interpreter is shared since building it is the expensive part, and
+    asteval is only imported once the LLM actually picks the Calculator tool.
+    asteval keeps state on the instance, so evaluations are serialised with
+    _ASTEVAL_LOCK since tool calls may run concurrently in executor threads.
+    """
+    import asteval
+
+    interpreter = asteval.Interpreter(
+        symtable=dict(_CALC_SYMBOLS),
+        minimal=True,
+        use_numpy=False,
+        readonly_symbols=set(_CALC_SYMBOLS),
+    )
+    # asteval adds its own print() to any symtable it is given
+    for name in set(interpreter.symtable) - set(_CALC_SYMBOLS):
+        del interpreter.symtable[name]
+    return interpreter
+
+
+def _check_expression(expression: str) -> None:
+    """Reject anything but a single expression.
+
+    Assignments would otherwise persist on the shared interpreter and leak
+    into later calls from unrelated conversations.
+    """
+    tree = ast.parse(expression, mode="eval")
+    if any(isinstance(node, ast.NamedExpr) for node in ast.walk(tree)):
+        raise SyntaxError("assignment is not allowed")
+
 
 def calculator_func(expression: str) -> str:
-    """Calculates a math expression using numexpr.
+    """Calculates a math expression.
 
-    Useful for when you need to answer questions about math using numexpr.
+    Useful for when you need to answer questions about math.
     This tool is only for math questions and nothing else. Only input
     math expressions.
 
     Args:
-        expression (str): A valid numexpr formatted math expression.
+        expression (str): A valid Python formatted math expression, e.g. "sqrt(3**2 + 4**2)".
 
     Returns:
         str: The result of the math expression.
     """
 
     try:
-        local_dict = {"pi": math.pi, "e": math.e}
-        output = str(
-            numexpr.evaluate(
-                expression.strip(),
-                global_dict={},  # restrict access to globals
-                local_dict=local_dict,  # add common mathematical functions
-            )
-        )
-        return re.sub(r"^\[|\]$", "", output)
+        expression = expression.strip()
+        _check_expression(expression)
+        interpreter = _get_interpreter()
+        with _ASTEVAL_LOCK:
+            output = interpreter(expression, show_errors=False, raise_errors=True)
+        return str(output)
     except Exception as e:
         raise ValueError(
             f'calculator("{expression}") raised error: {e}.'
@@ -45,7 +149,93 @@ calculator: BaseTool = tool(calculator_func)
 calculator.name = "Calculator"
 
 
-def get_nearby_safe_places(location: str) -> list[dict]:
+# Keep-alive HTTP/2 client shared by every tool. Parallel tool calls to the
+# backend are multiplexed over one connection instead of each opening its own.
+# The transport retries connection failures only: the request never reached
+# the backend, so this is safe even for the SOS alert.
+_client: httpx.AsyncClient | None = None
+_client_lock = asyncio.Lock()
+
+
+async def _get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        async with _client_lock:
+            if _client is None or _client.is_closed:
+                transport = httpx.AsyncHTTPTransport(
+                    http2=True,
+                    retries=2,
+                    limits=httpx.Limits(max_keepalive_connections=20),
+                )
+                _client = httpx.AsyncClient(transport=transport, timeout=10.0)
+    return _client
+
+
+async def aclose_http_client() -> None:
+    """Close the shared HTTP client, e.g. on service shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _post_json(
+    path: str, payload: dict, *, raise_for_status: bool = False
+) -> dict:
+    """POST a JSON payload to the backend and return the decoded response."""
+    client = await _get_client()
+    r = await client.post(
+        f"{BACKEND_URL}{path}", headers=_HEADERS, content=orjson.dumps(payload)
+    )
+    if raise_for_status:
+        r.raise_for_status()
+    return orjson.loads(r.content)
+
+
+# Geocoding results keyed by normalized address, shared by every location tool
+_geocode_cache: TTLCache[str, tuple[str, str]] = TTLCache(maxsize=1024, ttl=3600)
+# Lookups currently in flight, so concurrent requests for the same address
+# (e.g. parallel tool calls, or a route whose start equals its destination)
+# share a single backend round-trip.
+_geocode_inflight: dict[str, asyncio.Task[tuple[str, str]]] = {}
+_geocode_lock = asyncio.Lock()
+
+
+async def _fetch_geocode(key: str, address: str) -> tuple[str, str]:
+    """Geocode an address via the backend and cache successful results."""
+    try:
+        response_json = await _post_json(
+            "/api/maps/get-latitude-longitude", {"address": address}
+        )
+        latitude = response_json.get("latitude", "")
+        longitude = response_json.get("longitude", "")
+
+        # Don't cache failed lookups so they are retried on the next call
+        if latitude and longitude:
+            async with _geocode_lock:
+                _geocode_cache[key] = (latitude, longitude)
+        return latitude, longitude
+    finally:
+        _geocode_inflight.pop(key, None)
+
+
+async def _geocode(address: str) -> tuple[str, str]:
+    """Resolve an address to a (latitude, longitude) pair, using the cache if possible."""
+    key = address.strip().lower()
+    async with _geocode_lock:
+        cached = _geocode_cache.get(key)
+        if cached is not None:
+            return cached
+        task = _geocode_inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(_fetch_geocode(key, address))
+            _geocode_inflight[key] = task
+    # Shield the shared lookup so one cancelled caller doesn't cancel the others
+    return await asyncio.shield(task)
+
+
+async def get_nearby_safe_places(location: str) -> list[dict]:
     """
     Get nearby places using ola API endpoint
 
@@ -59,33 +249,18 @@ def get_nearby_safe_places(location: str) -> list[dict]:
     Returns:
         str: A list of nearby places
     """
-    load_dotenv()
-    url = f"{os.getenv('BACKEND_URL')}/api/maps/get-latitude-longitude"
-    payload = json.dumps({"address": location})
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": "Bearer asdasd",
+    latitude, longitude = await _geocode(location)
+
+    payload = {
+        "current_location": {
+            "latitude": latitude,
+            "longitude": longitude,
+            "address": location,
+        },
+        "radius": 5000,
+        "rank_by": "distance",
     }
-
-    response = requests.request("POST", url, headers=headers, data=payload)
-    response_json = response.json()
-    latitude = response_json.get("latitude", "")
-    longitude = response_json.get("longitude", "")
-
-    url = f"{os.getenv('BACKEND_URL')}/api/maps/nearby-safe-spots"
-    payload = json.dumps(
-        {
-            "current_location": {
-                "latitude": latitude,
-                "longitude": longitude,
-                "address": location,
-            },
-            "radius": 5000,
-            "rank_by": "distance",
-        }
-    )
-    response = requests.request("POST", url, headers=headers, data=payload)
-    response_json = response.json()
+    response_json = await _post_json("/api/maps/nearby-safe-spots", payload)
     nearby_places = response_json["predictions"]
 
     return nearby_places
@@ -95,7 +270,7 @@ nearby_places: BaseTool = tool(get_nearby_safe_places)
 nearby_places.name = "Nearby_Places"
 
 
-def get_current_location() -> dict:
+async def get_current_location() -> dict:
     """
     Get current location based on IP address.
 
@@ -106,14 +281,14 @@ def get_current_location() -> dict:
         dict: A dictionary containing location information including address,
               latitude, longitude, city, country, etc.
     """
-    load_dotenv()
     try:
+        client = await _get_client()
         # Make request to IP geolocation API
-        response = requests.get("https://ipinfo.io/json")
-        if response.status_code != 200:
-            raise ValueError(f"Failed to get location data: {response.status_code}")
+        r = await client.get("https://ipinfo.io/json")
+        if r.status_code != 200:
+            raise ValueError(f"Failed to get location data: {r.status_code}")
 
-        ip_data = response.json()
+        ip_data = orjson.loads(r.content)
 
         # Extract location coordinates from the response (format: "latitude,longitude")
         if "loc" in ip_data:
@@ -142,7 +317,7 @@ current_location: BaseTool = tool(get_current_location)
 current_location.name = "Current_Location"
 
 
-def get_route(start: str, destination: str) -> list[dict]:
+async def get_route(start: str, destination: str) -> list[dict]:
     """
     Get a route between two locations.
 
@@ -160,44 +335,38 @@ def get_route(start: str, destination: str) -> list[dict]:
                    - distance: Distance for this step
                    - duration: Estimated duration for this step
     """
-    load_dotenv()
     try:
-        url = f"{os.getenv('BACKEND_URL')}/api/maps/get-latitude-longitude"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": "Bearer asdasd",
-        }
-        payload = json.dumps({"address": start})
-
-        response = requests.request("POST", url, headers=headers, data=payload)
-        response_json = response.json()
-        start_latitude = response_json.get("latitude", "")
-        start_longitude = response_json.get("longitude", "")
-
-        payload = json.dumps({"address": destination})
-
-        response = requests.request("POST", url, headers=headers, data=payload)
-        response_json = response.json()
-        destination_latitude = response_json.get("latitude", "")
-        destination_longitude = response_json.get("longitude", "")
-
-        url = f"{os.getenv('BACKEND_URL')}/api/maps/get-route"
-        payload = json.dumps(
-            {
-                "origin": {
-                    "latitude": start_latitude,
-                    "longitude": start_longitude,
-                    "address": start,
-                },
-                "destination": {
-                    "latitude": destination_latitude,
-                    "longitude": destination_longitude,
-                    "address": destination,
-                },
+        if BACKEND_ROUTE_WITH_SAFETY:
+            response_json = await _post_json(
+                "/api/maps/route-with-safety",
+                {"start_address": start, "destination_address": destination},
+                raise_for_status=True,
+            )
+            return {
+                "route_steps": response_json["route_steps"],
+                "safety_tips": response_json.get("safety_tips", ""),
             }
+
+        # The two geocodes are independent, so resolve them concurrently
+        start_geo, destination_geo = await asyncio.gather(
+            _geocode(start), _geocode(destination)
         )
-        response = requests.request("POST", url, headers=headers, data=payload)
-        response_json = response.json()
+        start_latitude, start_longitude = start_geo
+        destination_latitude, destination_longitude = destination_geo
+
+        payload = {
+            "origin": {
+                "latitude": start_latitude,
+                "longitude": start_longitude,
+                "address": start,
+            },
+            "destination": {
+                "latitude": destination_latitude,
+                "longitude": destination_longitude,
+                "address": destination,
+            },
+        }
+        response_json = await _post_json("/api/maps/get-route", payload)
 
         routes = response_json["routes"]
 
@@ -212,10 +381,8 @@ def get_route(start: str, destination: str) -> list[dict]:
                 }
                 route_steps.append(route_step)
 
-        url = f"{os.getenv('BACKEND_URL')}/api/llm/route-safety"
-        payload = json.dumps({"route_steps": route_steps})
-        response = requests.request("POST", url, headers=headers, data=payload)
-        response_json = response.json()
+        payload = {"route_steps": route_steps}
+        response_json = await _post_json("/api/llm/route-safety", payload)
 
         response_data = {
             "route_steps": route_steps,
@@ -232,7 +399,9 @@ route: BaseTool = tool(get_route)
 route.name = "get_route"
 
 
-def send_sos_alert(location: str, custom_message: str = "Help! I am in danger.") -> str:
+async def send_sos_alert(
+    location: str, custom_message: str = "Help! I am in danger."
+) -> str:
     """
     Send SOS alert to emergency services.
 
@@ -245,41 +414,21 @@ def send_sos_alert(location: str, custom_message: str = "Help! I am in danger.")
     Returns:
         str: A message indicating the SOS alert was sent successfully.
     """
-    load_dotenv()
     try:
-        url = f"{os.getenv('BACKEND_URL')}/api/maps/get-latitude-longitude"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": "Bearer asdasd",
-        }
-        payload = json.dumps({"address": location})
+        latitude, longitude = await _geocode(location)
 
-        response = requests.request("POST", url, headers=headers, data=payload)
-        response_json = response.json()
-        latitude = response_json.get("latitude", "")
-        longitude = response_json.get("longitude", "")
-
-        url = f"{os.getenv('BACKEND_URL')}/api/sos/send-alert"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": "Bearer asdasd",
+        payload = {
+            "user_id": "67de72427e1f7f041d589ba7",
+            "timestamp": datetime.now().isoformat(),
+            "location": {
+                "latitude": latitude,
+                "longitude": longitude,
+                "address": location,
+            },
+            "message": custom_message,
         }
 
-        payload = json.dumps(
-            {
-                "user_id": "67de72427e1f7f041d589ba7",
-                "timestamp": datetime.now().isoformat(),
-                "location": {
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "address": location,
-                },
-                "message": custom_message,
-            }
-        )
-
-        response = requests.request("POST", url, headers=headers, data=payload)
-        response_json = response.json()
+        response_json = await _post_json("/api/sos/send-alert", payload)
         return response_json.get("message", "")
 
     except Exception as e:
@@ -291,7 +440,9 @@ sos_alert.name = "sos_alert"
 
 if __name__ == "__main__":
     print(
-        send_sos_alert(
-            location="Axis Bank Limited, Alapakkam, Chengalpattu, Tamil Nadu"
+        asyncio.run(
+            send_sos_alert(
+                location="Axis Bank Limited, Alapakkam, Chengalpattu, Tamil Nadu"
+            )
         )
     )
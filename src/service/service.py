@@ -11,13 +11,14 @@ from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from langchain_core._api import LangChainBetaWarning
 from langchain_core.messages import (AIMessage, AIMessageChunk, AnyMessage,
-                                     HumanMessage, ToolMessage)
+                                     HumanMessage, RemoveMessage, ToolMessage)
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.types import Command, Interrupt
 from langsmith import Client as LangsmithClient
 
-from agents import DEFAULT_AGENT, get_agent, get_all_agent_info
+from agents import DEFAULT_AGENT, get_agent, get_all_agent_info, warmup_agents
+from agents.tools import aclose_http_client
 from core import settings
 from memory import initialize_database
 from schema import (ChatHistory, ChatHistoryInput, ChatMessage, Feedback,
@@ -58,7 +59,13 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             for a in agents:
                 agent = get_agent(a.key)
                 agent.checkpointer = saver
+            try:
+                warmup_agents()
+            except Exception as e:
+                # Warmup is only an optimization, don't block startup on it
+                logger.warning(f"Agent warmup failed: {e}")
             yield
+            await aclose_http_client()
     except Exception as e:
         logger.error(f"Error during database initialization: {e}")
         raise
@@ -196,6 +203,12 @@ async def message_generator(
                         new_messages.append(AIMessage(content=interrupt.value))
                     continue
                 update_messages = updates.get("messages", [])
+                # History trimming removals are state bookkeeping, not output
+                update_messages = [
+                    msg
+                    for msg in update_messages
+                    if not isinstance(msg, RemoveMessage)
+                ]
                 # special cases for using langgraph-supervisor library
                 if node == "supervisor":
                     # Get only the last AIMessage since supervisor includes all previous messages
@@ -1,18 +1,11 @@
 import asyncio
-import base64
 import os
 import urllib.parse
 from collections.abc import AsyncGenerator
-from io import BytesIO
 
-import numpy as np
-import soundfile as sf
-import speech_recognition as sr
 import streamlit as st
 from dotenv import load_dotenv
-from gtts import gTTS
 from pydantic import ValidationError
-from pydub import AudioSegment
 from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 from client import AgentClient, AgentClientError
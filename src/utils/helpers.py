@@ -1,16 +1,28 @@
 import base64
 from io import BytesIO
 
-import numpy as np
-import soundfile as sf
-import speech_recognition as sr
 import streamlit as st
-from gtts import gTTS
-from pydub import AudioSegment
+
+# The audio libraries are imported inside the functions that use them, so
+# pages that import these helpers don't pay for loading them (and FFmpeg
+# discovery in pydub) until speech is actually used.
+
+
+def _is_pcm_wav(audio_bytes):
+    """Check whether WAV bytes hold PCM samples that speech recognition reads"""
+    import soundfile as sf
+
+    try:
+        return sf.info(BytesIO(audio_bytes)).subtype.startswith("PCM_")
+    except Exception:
+        return False
 
 
 def speech_to_text(audio_bytes):
     """Convert speech audio to text using speech recognition"""
+    import soundfile as sf
+    import speech_recognition as sr
+
     try:
         # Convert the UploadedFile to bytes
         if hasattr(audio_bytes, "read"):
@@ -19,19 +31,27 @@ def speech_to_text(audio_bytes):
             except Exception as e:
                 return None
 
-        # Convert the audio bytes to numpy array
-        try:
-            audio_data, sample_rate = sf.read(BytesIO(audio_bytes))
+        # PCM WAV can be handed to speech recognition as is. Other WAV
+        # encodings (e.g. float) are converted like any other format.
+        if audio_bytes[:4] == b"RIFF" and _is_pcm_wav(audio_bytes):
+            wav_io = BytesIO(audio_bytes)
+        else:
+            # Convert the audio bytes to numpy array
+            try:
+                audio_data, sample_rate = sf.read(BytesIO(audio_bytes))
 
-        except Exception as e:
-            return None
+            except Exception as e:
+                return None
 
-        # Create a BytesIO object with the audio in WAV format
-        try:
-            wav_io = BytesIO()
-            wav_io.seek(0)
-        except Exception as e:
-            return None
+            # Create a BytesIO object with the audio in WAV format
+            try:
+                wav_io = BytesIO()
+                sf.write(
+                    wav_io, audio_data, sample_rate, format="WAV", subtype="PCM_16"
+                )
+                wav_io.seek(0)
+            except Exception as e:
+                return None
 
         # Use speech recognition to convert to text
         try:
@@ -56,6 +76,9 @@ def speech_to_text(audio_bytes):
 
 def text_to_speech(text, speed=1.5):
     """Convert text to speech and return audio data with speed adjustment"""
+    from gtts import gTTS
+    from pydub import AudioSegment
+
     try:
         tts = gTTS(text=text, lang="en")
         audio_bytes = BytesIO()
@@ -70,9 +93,10 @@ def text_to_speech(text, speed=1.5):
         )
         faster_sound = faster_sound.set_frame_rate(sound.frame_rate)
 
-        # Export to bytes
+        # Export to WAV bytes: pydub writes WAV natively, avoiding a second
+        # FFmpeg process to re-encode MP3
         output = BytesIO()
-        faster_sound.export(output, format="mp3")
+        faster_sound.export(output, format="wav")
         output.seek(0)
         return output.read()
     except Exception as e:
@@ -83,10 +107,10 @@ def text_to_speech(text, speed=1.5):
 def get_audio_player(audio_bytes):
     """Return HTML audio player with the audio data"""
     if audio_bytes:
-        b64 = base64.b64encode(audio_bytes).decode()
+        b64 = base64.b64encode(audio_bytes).decode("ascii")
         return f"""
         <audio controls autoplay=false>
-            <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
+            <source src="data:audio/wav;base64,{b64}" type="audio/wav">
         </audio>
         """
     return ""
@@ -0,0 +1,232 @@
+import asyncio
+import json
+from typing import Any
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+
+from agents import research_assistant as ra
+
+
+class ScriptedToolModel(BaseChatModel):
+    """Chat model that replies with a fixed sequence of AIMessages."""
+
+    responses: list[AIMessage]
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-tool-model"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedToolModel":
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self.responses.pop(0))])
+
+
+@tool
+async def slow_echo(text: str) -> str:
+    """Echo text after a delay."""
+    await asyncio.sleep(0.05)
+    return text
+
+
+@tool
+async def lookup(key: str) -> dict:
+    """Return a structured result."""
+    return {"key": key, "value": "ünïcode"}
+
+
+@tool
+async def broken(reason: str) -> str:
+    """Always fail."""
+    raise RuntimeError(reason)
+
+
+@pytest.fixture
+def graph_with(monkeypatch):
+    """Point the research assistant at a scripted model and fake tools."""
+    fake_tools = {t.name: t for t in (slow_echo, lookup, broken)}
+    monkeypatch.setattr(ra, "tools_by_name", fake_tools)
+    monkeypatch.setattr(ra, "_WRAPPED", {})
+
+    def install(responses: list[AIMessage]) -> ScriptedToolModel:
+        model = ScriptedToolModel(responses=responses)
+        monkeypatch.setattr(ra, "get_model", lambda name: model)
+        return model
+
+    return install
+
+
+async def run_graph(message: str) -> list:
+    result = await ra.research_assistant.ainvoke(
+        {"messages": [HumanMessage(content=message)], "first_run": False},
+        {"configurable": {"thread_id": message, "model": "scripted"}},
+    )
+    return result["messages"]
+
+
+@pytest.mark.asyncio
+async def test_parallel_tools_keeps_tool_call_order(graph_with) -> None:
+    graph_with(
+        [
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "slow_echo", "args": {"text": "first"}, "id": "call_1"},
+                    {"name": "lookup", "args": {"key": "second"}, "id": "call_2"},
+                ],
+            ),
+            AIMessage(content="done"),
+        ]
+    )
+
+    messages = await run_graph("order")
+
+    tool_messages = [m for m in messages if isinstance(m, ToolMessage)]
+    # slow_echo finishes last but its result still comes first
+    assert [m.tool_call_id for m in tool_messages] == ["call_1", "call_2"]
+    assert [m.name for m in tool_messages] == ["slow_echo", "lookup"]
+    assert tool_messages[0].content == "first"
+    assert tool_messages[1].content == '{"key": "second", "value": "ünïcode"}'
+    assert messages[-1].content == "done"
+
+
+@pytest.mark.asyncio
+async def test_parallel_tools_reports_errors_per_call(graph_with) -> None:
+    graph_with(
+        [
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "broken", "args": {"reason": "boom"}, "id": "call_1"},
+                    {"name": "missing", "args": {}, "id": "call_2"},
+                    {"name": "slow_echo", "args": {"text": "ok"}, "id": "call_3"},
+                ],
+            ),
+            AIMessage(content="done"),
+        ]
+    )
+
+    messages = await run_graph("errors")
+
+    broken_msg, missing_msg, ok_msg = [
+        m for m in messages if isinstance(m, ToolMessage)
+    ]
+    assert broken_msg.status == "error"
+    assert broken_msg.content == (
+        "Error: RuntimeError('boom')\n Please fix your mistakes."
+    )
+    assert missing_msg.status == "error"
+    assert "missing is not a valid tool" in missing_msg.content
+    assert "slow_echo" in missing_msg.content
+    assert ok_msg.status == "success"
+    assert ok_msg.content == "ok"
+
+
+def test_tool_content_matches_tool_node() -> None:
+    blocks = [{"type": "text", "text": "hi"}]
+    assert ra._tool_content("plain") == "plain"
+    assert ra._tool_content(blocks) is blocks
+    assert ra._tool_content({"value": "ünïcode"}) == json.dumps(
+        {"value": "ünïcode"}, ensure_ascii=False
+    )
+    assert ra._tool_content([1, 2]) == "[1, 2]"
+    assert ra._tool_content({1, 2}) == str({1, 2})
+
+
+@pytest.fixture
+def routing_calls(monkeypatch):
+    """Empty the routing cache and record calls to determine_agent."""
+    monkeypatch.setattr(ra, "_routing_cache", ra.TTLCache(maxsize=8, ttl=60))
+    calls = []
+    determine_agent = ra.determine_agent
+
+    def spy(state):
+        calls.append(state["messages"][-1].content)
+        return determine_agent(state)
+
+    monkeypatch.setattr(ra, "determine_agent", spy)
+    return calls
+
+
+def routing_state(message: str) -> dict:
+    return {"messages": [HumanMessage(content=message)]}
+
+
+def test_cached_determine_agent_miss_then_hit(routing_calls) -> None:
+    assert ra.cached_determine_agent(routing_state("I need help now")) == "emergency"
+    assert len(ra._routing_cache) == 1
+    assert ra.cached_determine_agent(routing_state("I need help now")) == "emergency"
+    assert routing_calls == ["I need help now"]
+
+    assert ra.cached_determine_agent(routing_state("Is this area safe?")) == "location"
+    assert routing_calls == ["I need help now", "Is this area safe?"]
+
+
+def test_cached_determine_agent_disabled(routing_calls, monkeypatch) -> None:
+    monkeypatch.setattr(ra.settings, "ROUTING_CACHE_ENABLED", False)
+
+    assert ra.cached_determine_agent(routing_state("Tell me a story")) == "companion"
+    assert ra.cached_determine_agent(routing_state("Tell me a story")) == "companion"
+    assert routing_calls == ["Tell me a story", "Tell me a story"]
+    assert len(ra._routing_cache) == 0
+
+
+def tool_loop(start: int, steps: int) -> list:
+    """An AI tool call and tool result pair per step, with ids from start."""
+    messages = []
+    for n in range(start, start + 2 * steps, 2):
+        call_id = f"call_{n}"
+        messages.append(
+            AIMessage(
+                content="",
+                id=str(n),
+                tool_calls=[{"name": "lookup", "args": {"key": "k"}, "id": call_id}],
+            )
+        )
+        messages.append(ToolMessage(content="v", tool_call_id=call_id, id=str(n + 1)))
+    return messages
+
+
+def removed_ids(messages: list) -> list[str]:
+    return [m.id for m in ra.trim_history(messages)]
+
+
+def test_trim_history_at_limit_keeps_everything() -> None:
+    messages = [
+        HumanMessage(content="hi", id=str(n)) for n in range(ra.MAX_RETAINED_MESSAGES)
+    ]
+    assert ra.trim_history(messages) == []
+    assert ra.trim_history(messages[:3]) == []
+
+
+def test_trim_history_cut_moves_past_tool_loop() -> None:
+    # 22 messages: the plain cut at index 2 lands on a tool result whose
+    # tool call would be dropped
+    messages = [HumanMessage(content="q1", id="0")] + tool_loop(1, 5)
+    messages += [AIMessage(content="a1", id="11"), HumanMessage(content="q2", id="12")]
+    messages += tool_loop(13, 4) + [AIMessage(content="a2", id="21")]
+
+    assert len(messages) == ra.MAX_RETAINED_MESSAGES + 2
+    assert isinstance(messages[2], ToolMessage)
+    assert removed_ids(messages) == [str(n) for n in range(12)]
+
+
+def test_trim_history_keeps_long_last_exchange() -> None:
+    # No human message after the plain cut, so keep from the last one
+    messages = [
+        HumanMessage(content="q1", id="0"),
+        AIMessage(content="a1", id="1"),
+        HumanMessage(content="q2", id="2"),
+    ] + tool_loop(3, ra.MAX_RETAINED_MESSAGES)
+
+    assert removed_ids(messages) == ["0", "1"]
+
+
+def test_trim_history_without_human_messages() -> None:
+    messages = tool_loop(0, ra.MAX_RETAINED_MESSAGES)
+    assert ra.trim_history(messages) == []
@@ -0,0 +1,190 @@
+import asyncio
+import inspect
+import math
+import time
+
+import pytest
+
+from agents import tools
+from agents.tools import calculator_func, get_route
+
+
+def test_calculator_evaluates_math() -> None:
+    assert calculator_func("sqrt(3**2 + 4**2)") == "5.0"
+    assert calculator_func("round(2 * pi, 2)") == "6.28"
+    assert calculator_func("factorial(5)") == "120"
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["open('/etc/hostname').read()", "print(1)", "dir()", "__import__('os')"],
+)
+def test_calculator_rejects_non_math_names(expression: str) -> None:
+    with pytest.raises(ValueError):
+        calculator_func(expression)
+
+
+@pytest.mark.parametrize(
+    "expression", ["pow(10, 10**7)", "10**(10**7)", "factorial(10**7)"]
+)
+def test_calculator_rejects_huge_results_fast(expression: str) -> None:
+    start = time.monotonic()
+    with pytest.raises(ValueError):
+        calculator_func(expression)
+    assert time.monotonic() - start < 1
+
+
+@pytest.mark.parametrize("expression", ["y = 5", "(y := 5)", "pi = 3"])
+def test_calculator_rejects_assignments(expression: str) -> None:
+    with pytest.raises(ValueError):
+        calculator_func(expression)
+    with pytest.raises(ValueError):
+        calculator_func("y")
+    assert calculator_func("pi") == str(math.pi)
+
+
+class FakeBackend:
+    """Stand-in for tools._post_json that records calls and serves canned JSON."""
+
+    def __init__(self, responses: dict) -> None:
+        self.responses = responses
+        self.calls: list[tuple[str, dict]] = []
+
+    async def __call__(self, path: str, payload: dict, **kwargs) -> dict:
+        self.calls.append((path, payload))
+        response = self.responses[path]
+        if callable(response):
+            response = response(payload)
+            if inspect.isawaitable(response):
+                response = await response
+        return response
+
+    @property
+    def paths(self) -> list[str]:
+        return [path for path, _ in self.calls]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    fake = FakeBackend(
+        {
+            "/api/maps/get-latitude-longitude": {"latitude": "1", "longitude": "2"},
+            "/api/maps/get-route": {
+                "routes": [
+                    {
+                        "legs": [
+                            {
+                                "steps": [
+                                    {
+                                        "instructions": "Turn left",
+                                        "readable_distance": "1 km",
+                                        "readable_duration": "2 mins",
+                                    }
+                                ]
+                            }
+                        ]
+                    }
+                ]
+            },
+            "/api/llm/route-safety": {"safety_tips": "Stay on main roads"},
+            "/api/maps/route-with-safety": {
+                "route_steps": ["combined"],
+                "safety_tips": "Combined tips",
+            },
+        }
+    )
+    monkeypatch.setattr(tools, "_post_json", fake)
+    monkeypatch.setattr(tools, "_geocode_cache", tools.TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(tools, "_geocode_inflight", {})
+    monkeypatch.setattr(tools, "_geocode_lock", asyncio.Lock())
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_get_route_uses_separate_calls_by_default(backend, monkeypatch) -> None:
+    monkeypatch.setattr(tools, "BACKEND_ROUTE_WITH_SAFETY", False)
+
+    result = await get_route("Koramangala, Bangalore", "Indiranagar, Bangalore")
+
+    assert result == {
+        "route_steps": [
+            {"instructions": "Turn left", "distance": "1 km", "duration": "2 mins"}
+        ],
+        "safety_tips": "Stay on main roads",
+    }
+    assert "/api/maps/route-with-safety" not in backend.paths
+    assert backend.paths[-2:] == ["/api/maps/get-route", "/api/llm/route-safety"]
+
+
+@pytest.mark.asyncio
+async def test_get_route_uses_combined_endpoint_when_enabled(
+    backend, monkeypatch
+) -> None:
+    monkeypatch.setattr(tools, "BACKEND_ROUTE_WITH_SAFETY", True)
+
+    result = await get_route("Koramangala, Bangalore", "Indiranagar, Bangalore")
+
+    assert result == {"route_steps": ["combined"], "safety_tips": "Combined tips"}
+    assert backend.calls == [
+        (
+            "/api/maps/route-with-safety",
+            {
+                "start_address": "Koramangala, Bangalore",
+                "destination_address": "Indiranagar, Bangalore",
+            },
+        )
+    ]
+
+
+GEOCODE = "/api/maps/get-latitude-longitude"
+
+
+@pytest.mark.asyncio
+async def test_geocode_normalizes_cache_key(backend) -> None:
+    assert await tools._geocode("Koramangala, Bangalore") == ("1", "2")
+    assert await tools._geocode("  koramangala, BANGALORE ") == ("1", "2")
+    assert backend.paths == [GEOCODE]
+
+
+@pytest.mark.asyncio
+async def test_geocode_shares_concurrent_lookups(backend) -> None:
+    release = asyncio.Event()
+
+    async def slow_geocode(payload: dict) -> dict:
+        await release.wait()
+        return {"latitude": "1", "longitude": "2"}
+
+    backend.responses[GEOCODE] = slow_geocode
+    lookups = asyncio.gather(
+        tools._geocode("Koramangala"), tools._geocode("koramangala")
+    )
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await lookups == [("1", "2"), ("1", "2")]
+    assert backend.paths == [GEOCODE]
+
+
+@pytest.mark.asyncio
+async def test_geocode_does_not_cache_empty_coordinates(backend) -> None:
+    backend.responses[GEOCODE] = {"latitude": "", "longitude": ""}
+
+    assert await tools._geocode("Nowhere") == ("", "")
+    assert await tools._geocode("Nowhere") == ("", "")
+    assert backend.paths == [GEOCODE, GEOCODE]
+    assert "nowhere" not in tools._geocode_cache
+
+
+@pytest.mark.asyncio
+async def test_geocode_failure_clears_inflight_entry(backend) -> None:
+    def fail(payload: dict) -> dict:
+        raise RuntimeError("backend down")
+
+    backend.responses[GEOCODE] = fail
+    with pytest.raises(RuntimeError):
+        await tools._geocode("Koramangala")
+    assert tools._geocode_inflight == {}
+
+    backend.responses[GEOCODE] = {"latitude": "1", "longitude": "2"}
+    assert await tools._geocode("Koramangala") == ("1", "2")
+    assert len(backend.calls) == 2
@@ -3,13 +3,16 @@ from unittest.mock import AsyncMock, patch
 
 import langsmith
 import pytest
-from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from fastapi.testclient import TestClient
+from langchain_core.messages import (AIMessage, AIMessageChunk, HumanMessage,
+                                     RemoveMessage)
 from langgraph.pregel.types import StateSnapshot
 from langgraph.types import Interrupt
 
 from agents.agents import Agent
 from schema import ChatHistory, ChatMessage, ServiceMetadata
 from schema.models import OpenAIModelName
+from service import app
 
 
 def test_invoke(test_client, mock_agent) -> None:
@@ -316,6 +319,46 @@ async def test_stream_no_tokens(test_client, mock_agent) -> None:
         assert messages[0]["content"]["type"] == "ai"
 
 
+def test_stream_skips_remove_messages(test_client, mock_agent) -> None:
+    """History trimming removals in node updates are not sent to the client."""
+    QUESTION = "What is the weather in Tokyo?"
+    FINAL_ANSWER = "The weather in Tokyo is sunny."
+    events = [
+        (
+            "updates",
+            {
+                "chat_model": {
+                    "messages": [
+                        RemoveMessage(id="1"),
+                        RemoveMessage(id="2"),
+                        AIMessage(content=FINAL_ANSWER),
+                    ]
+                }
+            },
+        )
+    ]
+
+    async def mock_astream(**kwargs):
+        for event in events:
+            yield event
+
+    mock_agent.astream = mock_astream
+
+    with test_client.stream(
+        "POST", "/stream", json={"message": QUESTION, "stream_tokens": False}
+    ) as response:
+        assert response.status_code == 200
+
+        messages = []
+        for line in response.iter_lines():
+            if line and line.strip() != "data: [DONE]":  # Skip [DONE] message
+                messages.append(json.loads(line.lstrip("data: ")))
+
+        assert len(messages) == 1
+        assert messages[0]["type"] == "message"
+        assert messages[0]["content"]["content"] == FINAL_ANSWER
+
+
 def test_stream_interrupt(test_client, mock_agent) -> None:
     QUESTION = "What is the weather in Tokyo?"
     INTERRUPT = "Confirm weather check"
@@ -373,3 +416,14 @@ def test_info(test_client, mock_settings) -> None:
 
     assert output.default_model == OpenAIModelName.GPT_4O_MINI
     assert output.models == [OpenAIModelName.GPT_4O, OpenAIModelName.GPT_4O_MINI]
+
+
+def test_lifespan_warms_up_agents() -> None:
+    """Test that agents are warmed up on startup and a warmup failure doesn't block it."""
+    with patch(
+        "service.service.warmup_agents", side_effect=RuntimeError("warmup failed")
+    ) as mock_warmup:
+        with TestClient(app) as client:
+            assert client.get("/health").status_code == 200
+
+    mock_warmup.assert_called_once()